@@ -1,14 +1,72 @@
 import numpy as np
-from typing import Dict, List
+from functools import lru_cache
+from numba import njit, prange
+from typing import Dict, List, Tuple
 from normalizacion import (
-    COLONIAS, EDIFICACIONES, SOCIAL_NORM, LEGAL_NORM, 
-    CONSUMO_NORM, REPORTES_NORM
+    SOCIAL_ARR, LEGAL_ARR, CONSUMO_ARR, REPORTES_ARR,
+    WEIGHT_MAT, EDIF_IDX, COL_IDX
 )
 
 # ============================================================================
 # FUNCIÓN HEURÍSTICA
 # ============================================================================
 
+def calcular_heuristica_idx(alpha: float, beta: float, gamma: float, delta: float,
+                            edif_idx: int, col_idx: int) -> float:
+    """
+    Calcula el valor heurístico indexando los arreglos precomputados.
+
+    Variante de calcular_heuristica que recibe índices enteros (posición
+    dentro de EDIFICACIONES y COLONIAS) en lugar de nombres, evitando el
+    hasheo de cadenas en bucles internos.
+
+    Args:
+        alpha, beta, gamma, delta: Pesos de la heurística
+        edif_idx: Índice de la edificación en EDIFICACIONES
+        col_idx: Índice de la colonia en COLONIAS
+
+    Returns:
+        Valor heurístico (0-1), mayor valor = mayor prioridad
+    """
+    return (alpha * SOCIAL_ARR[edif_idx] + beta * LEGAL_ARR[edif_idx]
+            + gamma * CONSUMO_ARR[col_idx] + delta * REPORTES_ARR[col_idx])
+
+
+# Tensor constante de componentes (4, E, C): las cuatro matrices de factores
+# (social, legal, consumo, reportes) extendidas sobre la malla completa
+# edificación × colonia, construidas una sola vez al importar. La heurística
+# de cualquier vector de pesos es una combinación lineal de estas capas.
+# Se almacena en float32: los factores son puntuaciones acotadas en [0, 1]
+# y la media sobre 7 valores conserva holgadamente los 4 decimales que se
+# reportan, con la mitad del tráfico de memoria en las contracciones.
+_COMPONENTES = np.ascontiguousarray(np.stack([
+    np.broadcast_to(SOCIAL_ARR[:, None], (SOCIAL_ARR.size, CONSUMO_ARR.size)),
+    np.broadcast_to(LEGAL_ARR[:, None], (LEGAL_ARR.size, CONSUMO_ARR.size)),
+    np.broadcast_to(CONSUMO_ARR[None, :], (SOCIAL_ARR.size, CONSUMO_ARR.size)),
+    np.broadcast_to(REPORTES_ARR[None, :], (SOCIAL_ARR.size, REPORTES_ARR.size)),
+]), dtype=np.float32)
+
+
+def calcular_heuristica_matriz(alpha: float, beta: float, gamma: float,
+                               delta: float) -> np.ndarray:
+    """
+    Calcula la heurística de todos los pares (edificación, colonia) a la vez.
+
+    Equivale a llamar calcular_heuristica sobre cada celda, pero resuelve
+    la malla completa como combinación lineal de las capas constantes de
+    _COMPONENTES, precomputadas al importar el módulo.
+
+    Args:
+        alpha, beta, gamma, delta: Pesos de la heurística
+
+    Returns:
+        Matriz de forma (E, C) donde la celda [i, j] es la heurística del
+        par (EDIFICACIONES[i], COLONIAS[j])
+    """
+    return (alpha * _COMPONENTES[0] + beta * _COMPONENTES[1]
+            + gamma * _COMPONENTES[2] + delta * _COMPONENTES[3])
+
+
 def calcular_heuristica(alpha: float, beta: float, gamma: float, delta: float,
                         edificacion: str, colonia: str) -> float:
     """
@@ -39,18 +97,14 @@ def calcular_heuristica(alpha: float, beta: float, gamma: float, delta: float,
     Returns:
         Valor heurístico (0-1), mayor valor = mayor prioridad
     """
-    x = SOCIAL_NORM.get(edificacion, 0)
-    y = LEGAL_NORM.get(edificacion, 0)
-    z = CONSUMO_NORM.get(colonia, 0)
-    w = REPORTES_NORM.get(colonia, 0)
-
-    return alpha * x + beta * y + gamma * z + delta * w
+    return calcular_heuristica_idx(alpha, beta, gamma, delta,
+                                   EDIF_IDX[edificacion], COL_IDX[colonia])
 
 # ============================================================================
 # FUNCIÓN DE UTILIDAD (OBJETIVO A MAXIMIZAR)
 # ============================================================================
 
-def calcular_coeficiente_gini(valores: List[float]) -> float:
+def calcular_coeficiente_gini(valores: List[float], ordenado: bool = False) -> float:
     """
     Calcula el coeficiente de Gini para medir desigualdad.
 
@@ -61,24 +115,31 @@ def calcular_coeficiente_gini(valores: List[float]) -> float:
     de prioridades resultante de la heurística.
 
     Args:
-        valores: Lista de valores a evaluar
+        valores: Lista o arreglo de valores a evaluar
+        ordenado: Si True, se asume que los valores ya vienen ordenados
+            de forma ascendente y se omite el np.sort
 
     Returns:
         Coeficiente de Gini (0-1)
     """
-    if len(valores) == 0:
-        return 0
+    valores = np.asarray(valores, dtype=np.float64)
+    if not ordenado:
+        valores = np.sort(valores)
+    n = valores.size
+
+    if n == 0:
+        return 0.0
 
-    valores = sorted(valores)
-    n = len(valores)
-    suma_total = sum(valores)
+    suma_total = valores.sum()
 
     if suma_total == 0:
-        return 0
+        return 0.0
 
     # Fórmula de Gini: (2 * suma_ponderada) / (n * suma_total) - (n+1)/n
-    suma_ponderada = sum((i + 1) * v for i, v in enumerate(valores))
-    return (2 * suma_ponderada) / (n * suma_total) - (n + 1) / n
+    # con la suma ponderada calculada como producto punto vectorizado
+    indices = np.arange(1, n + 1)
+    suma_ponderada = (indices * valores).sum()
+    return (2.0 * suma_ponderada) / (n * suma_total) - (n + 1) / n
 
 
 def calcular_utilidad(alpha: float, beta: float, gamma: float, delta: float) -> Dict:
@@ -101,49 +162,39 @@ def calcular_utilidad(alpha: float, beta: float, gamma: float, delta: float) ->
         Diccionario con utilidad total y sus componentes (escala 0-100)
     """
     # Calcular heurística para todas las combinaciones colonia-edificación
-    valores_heuristica = []
-    ponderacion_social = []
-    ponderacion_legal = []
-    ponderacion_consumo = []
-    ponderacion_reportes = []
-
-    for colonia in COLONIAS:
-        for edificacion in EDIFICACIONES:
-            # Valor heurístico
-            h = calcular_heuristica(alpha, beta, gamma, delta, edificacion, colonia)
-            valores_heuristica.append(h)
-
-            # Componentes individuales ponderados
-            ponderacion_social.append(h * SOCIAL_NORM[edificacion])
-            ponderacion_legal.append(h * LEGAL_NORM[edificacion])
-            ponderacion_consumo.append(h * CONSUMO_NORM[colonia])
-            ponderacion_reportes.append(h * REPORTES_NORM[colonia])
+    # en una sola expresión vectorizada: H[i, j] corresponde al par
+    # (COLONIAS[i], EDIFICACIONES[j]), equivalente al doble bucle original
+    # pero usando broadcasting sobre los arreglos precomputados.
+    H = (alpha * SOCIAL_ARR + beta * LEGAL_ARR
+         + (gamma * CONSUMO_ARR + delta * REPORTES_ARR)[:, None])
+
+    H_flat = H.ravel()
 
     # COMPONENTE 1: EQUIDAD (25%)
     # Medida mediante coeficiente de Gini invertido
     # Menor Gini = Mayor equidad
-    gini = calcular_coeficiente_gini(valores_heuristica)
+    gini = calcular_coeficiente_gini(H_flat)
     equidad = 100 * (1 - gini)
 
+    # Las cuatro sumas ponderadas en un solo producto matriz-vector:
+    # una pasada sobre H en lugar de cuatro
+    suma_total = H_flat.sum()
+    suma_social, suma_legal, suma_consumo, suma_reportes = WEIGHT_MAT @ H_flat
+
     # COMPONENTE 2: SATISFACCIÓN SOCIAL (30%)
     # Qué tanto se alinean las prioridades con la encuesta ciudadana
-    suma_social = sum(ponderacion_social)
-    suma_total = sum(valores_heuristica)
     satisfaccion_social = 100 * (suma_social / suma_total if suma_total > 0 else 0)
 
     # COMPONENTE 3: CUMPLIMIENTO LEGAL (25%)
     # Qué tanto se respetan las prioridades legales
-    suma_legal = sum(ponderacion_legal)
     cumplimiento_legal = 100 * (suma_legal / suma_total if suma_total > 0 else 0)
 
     # COMPONENTE 4: ATENCIÓN A ALTO CONSUMO (10%)
     # Qué tanto se prioriza a colonias con mayor consumo histórico
-    suma_consumo = sum(ponderacion_consumo)
     atencion_consumo = 100 * (suma_consumo / suma_total if suma_total > 0 else 0)
 
     # COMPONENTE 5: ATENCIÓN A REPORTES (10%)
     # Qué tanto se prioriza a colonias con más reportes de fallas
-    suma_reportes = sum(ponderacion_reportes)
     atencion_reportes = 100 * (suma_reportes / suma_total if suma_total > 0 else 0)
 
     # UTILIDAD TOTAL (ponderada)
@@ -163,3 +214,184 @@ def calcular_utilidad(alpha: float, beta: float, gamma: float, delta: float) ->
         'atencion_reportes': atencion_reportes,
         'coeficiente_gini': gini
     }
+
+
+# Orden de las columnas del arreglo que devuelve calcular_utilidad_arr,
+# alineado con las llaves del diccionario de calcular_utilidad
+CLAVES_UTILIDAD = (
+    'utilidad_total',
+    'equidad',
+    'satisfaccion_social',
+    'cumplimiento_legal',
+    'atencion_consumo',
+    'atencion_reportes',
+    'coeficiente_gini'
+)
+
+
+def utilidad_a_dict(fila: np.ndarray) -> Dict:
+    """
+    Convierte una fila de calcular_utilidad_arr al formato de diccionario
+    que devuelve calcular_utilidad.
+
+    Args:
+        fila: Arreglo de forma (7,) con las columnas en CLAVES_UTILIDAD
+
+    Returns:
+        Diccionario con utilidad total y sus componentes
+    """
+    return {clave: float(valor) for clave, valor in zip(CLAVES_UTILIDAD, fila)}
+
+
+@njit(parallel=True, fastmath=True, cache=True)
+def _utilidad_kernel(W, social, legal, consumo, reportes):
+    """
+    Núcleo compilado de la utilidad por lotes: prange sobre partículas,
+    con la malla H, las reducciones, el ordenamiento para Gini y la
+    mezcla de componentes fusionados en un solo recorrido por partícula.
+    Los arreglos constantes llegan como argumentos para que Numba
+    especialice sobre ellos.
+    """
+    P = W.shape[0]
+    C = consumo.shape[0]
+    E = social.shape[0]
+    n = C * E
+    out = np.empty((P, 7))
+
+    for p in prange(P):
+        h = np.empty(n)
+        total = 0.0
+        s_social = 0.0
+        s_legal = 0.0
+        s_consumo = 0.0
+        s_reportes = 0.0
+        k = 0
+        for i in range(C):
+            # Término que solo depende de la colonia, izado fuera del
+            # bucle de edificaciones
+            term_col = W[p, 2] * consumo[i] + W[p, 3] * reportes[i]
+            for j in range(E):
+                v = W[p, 0] * social[j] + W[p, 1] * legal[j] + term_col
+                h[k] = v
+                k += 1
+                total += v
+                s_social += v * social[j]
+                s_legal += v * legal[j]
+                s_consumo += v * consumo[i]
+                s_reportes += v * reportes[i]
+
+        # Gini con la misma fórmula cerrada que calcular_coeficiente_gini
+        gini = 0.0
+        satisfaccion = 0.0
+        cumplimiento = 0.0
+        atencion_con = 0.0
+        atencion_rep = 0.0
+        if total > 0:
+            h.sort()
+            suma_ponderada = 0.0
+            for k in range(n):
+                suma_ponderada += (k + 1) * h[k]
+            gini = (2.0 * suma_ponderada) / (n * total) - (n + 1) / n
+            satisfaccion = 100.0 * s_social / total
+            cumplimiento = 100.0 * s_legal / total
+            atencion_con = 100.0 * s_consumo / total
+            atencion_rep = 100.0 * s_reportes / total
+        equidad = 100.0 * (1.0 - gini)
+
+        # UTILIDAD TOTAL (misma ponderación que calcular_utilidad)
+        out[p, 0] = (0.30 * equidad + 0.25 * satisfaccion
+                     + 0.25 * cumplimiento + 0.10 * atencion_con
+                     + 0.10 * atencion_rep)
+        out[p, 1] = equidad
+        out[p, 2] = satisfaccion
+        out[p, 3] = cumplimiento
+        out[p, 4] = atencion_con
+        out[p, 5] = atencion_rep
+        out[p, 6] = gini
+
+    return out
+
+
+def calcular_utilidad_arr(W: np.ndarray) -> np.ndarray:
+    """
+    Calcula la utilidad multiobjetivo para un lote completo de partículas.
+
+    Versión por lotes de calcular_utilidad sobre el eje de partículas:
+    en lugar de evaluar el enjambre con P llamadas individuales, delega
+    en un núcleo compilado con Numba (prange paralelo sobre partículas,
+    con la construcción de H, las reducciones y el Gini fusionados), de
+    modo que una iteración completa del PSO se resuelve en una llamada
+    sin despacho de NumPy por operación.
+
+    Devuelve una matriz compacta en lugar de diccionarios para no crear
+    objetos de Python por partícula dentro del bucle de optimización; el
+    consumidor convierte a diccionario solo la fila que le interesa con
+    utilidad_a_dict.
+
+    Args:
+        W: Arreglo de forma (P, 4) con columnas [alpha, beta, gamma, delta]
+
+    Returns:
+        Arreglo de forma (P, 7) con las columnas en el orden de
+        CLAVES_UTILIDAD
+    """
+    W = np.ascontiguousarray(np.asarray(W, dtype=np.float64))
+    return _utilidad_kernel(W, SOCIAL_ARR, LEGAL_ARR,
+                            CONSUMO_ARR, REPORTES_ARR)
+
+
+def calcular_utilidad_batch(W: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Versión de calcular_utilidad_arr que devuelve los resultados por
+    componente en un diccionario de arreglos de forma (P,).
+    """
+    resultados = calcular_utilidad_arr(W)
+    return {clave: resultados[:, col]
+            for col, clave in enumerate(CLAVES_UTILIDAD)}
+
+
+def evaluar_pesos(pesos: np.ndarray) -> float:
+    """
+    Evalúa el objetivo escalar (utilidad total) de un vector de pesos.
+
+    Función de módulo sin estado, pensada para usarse con ejecutores de
+    procesos (multiprocessing / concurrent.futures): es picklable y los
+    arreglos constantes que necesita viven a nivel de módulo, así que los
+    procesos hijos los heredan sin costo de serialización.
+
+    Args:
+        pesos: Arreglo de forma (4,) con [alpha, beta, gamma, delta]
+
+    Returns:
+        Utilidad total (0-100) de esos pesos
+    """
+    return float(calcular_utilidad_arr(np.asarray(pesos)[None, :])[0, 0])
+
+
+@lru_cache(maxsize=4096)
+def _utilidad_fila_cached(alpha: float, beta: float, gamma: float,
+                          delta: float) -> Tuple[float, ...]:
+    """Evalúa una sola partícula y regresa la fila como tupla hasheable."""
+    fila = calcular_utilidad_arr(np.array([[alpha, beta, gamma, delta]]))[0]
+    return tuple(fila)
+
+
+def utilidad_fila_memo(pesos: np.ndarray, decimales: int = 6) -> np.ndarray:
+    """
+    Evalúa la utilidad de un vector de pesos con memoización.
+
+    Hacia el final de una corrida de PSO las partículas se agrupan
+    alrededor del mejor global y evalúan vectores casi idénticos; al
+    redondear los pesos y cachear por tupla, esas re-evaluaciones se
+    resuelven con una búsqueda en lugar de recomputar la utilidad.
+
+    Args:
+        pesos: Arreglo de forma (4,) con [alpha, beta, gamma, delta]
+        decimales: Decimales a los que se redondea la llave del caché
+
+    Returns:
+        Arreglo de forma (7,) con las columnas en el orden de
+        CLAVES_UTILIDAD, evaluado sobre los pesos redondeados
+    """
+    llave = tuple(np.round(pesos, decimales))
+    return np.array(_utilidad_fila_cached(*llave))
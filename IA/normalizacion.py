@@ -138,3 +138,40 @@ SOCIAL_NORM = normalizar_prioridades(SOCIAL)
 LEGAL_NORM = normalizar_prioridades(LEGAL)
 CONSUMO_NORM = normalizar_valores(CONSUMO)
 REPORTES_NORM = normalizar_valores(REPORTES)
+
+# ============================================================================
+# ARREGLOS PRECOMPUTADOS PARA CÁLCULO VECTORIZADO
+# ============================================================================
+
+# Índices enteros de cada edificación y colonia, para traducir nombres a
+# posiciones dentro de los arreglos una sola vez en lugar de hashear
+# cadenas en cada llamada
+EDIF_IDX = {nombre: i for i, nombre in enumerate(EDIFICACIONES)}
+COL_IDX = {nombre: i for i, nombre in enumerate(COLONIAS)}
+
+# Versiones en NumPy de los diccionarios normalizados, alineadas con el orden
+# de EDIFICACIONES y COLONIAS. Se construyen una sola vez al importar el
+# módulo para que la función de utilidad opere con broadcasting en lugar de
+# repetir búsquedas en diccionarios dentro del bucle de optimización.
+SOCIAL_ARR = np.array([SOCIAL_NORM[e] for e in EDIFICACIONES])
+LEGAL_ARR = np.array([LEGAL_NORM[e] for e in EDIFICACIONES])
+CONSUMO_ARR = np.array([CONSUMO_NORM[c] for c in COLONIAS])
+REPORTES_ARR = np.array([REPORTES_NORM[c] for c in COLONIAS])
+
+# Versiones "extendidas" sobre la malla completa colonia × edificación,
+# aplanadas en el mismo orden que H.ravel() (colonia externa, edificación
+# interna). Permiten calcular las sumas ponderadas como un producto plano
+# sin volver a hacer broadcasting en cada llamada.
+SOCIAL_TILE = np.ascontiguousarray(
+    np.broadcast_to(SOCIAL_ARR, (len(COLONIAS), len(EDIFICACIONES))).ravel())
+LEGAL_TILE = np.ascontiguousarray(
+    np.broadcast_to(LEGAL_ARR, (len(COLONIAS), len(EDIFICACIONES))).ravel())
+CONSUMO_TILE = np.ascontiguousarray(
+    np.broadcast_to(CONSUMO_ARR[:, None], (len(COLONIAS), len(EDIFICACIONES))).ravel())
+REPORTES_TILE = np.ascontiguousarray(
+    np.broadcast_to(REPORTES_ARR[:, None], (len(COLONIAS), len(EDIFICACIONES))).ravel())
+
+# Los cuatro vectores extendidos apilados en una matriz (4, C·E): las cuatro
+# sumas ponderadas de la utilidad se obtienen con un solo producto
+# matriz-vector (WEIGHT_MAT @ h) en lugar de cuatro pasadas sobre H.
+WEIGHT_MAT = np.stack([SOCIAL_TILE, LEGAL_TILE, CONSUMO_TILE, REPORTES_TILE])
@@ -1,6 +1,61 @@
 import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from numba import njit
 from typing import List, Dict, Tuple
-from funciones import calcular_utilidad
+from funciones import (calcular_utilidad_arr, utilidad_a_dict,
+                       utilidad_fila_memo, evaluar_pesos)
+
+# Desviación estándar del fitness del enjambre por debajo de la cual las
+# partículas se consideran agrupadas y conviene evaluar con memoización
+UMBRAL_MEMO = 1e-3
+
+# Columnas del historial de optimización, en el orden en que se guardan
+# en la matriz history_arr
+HISTORIAL_COLUMNAS = ('iteration', 'best_fitness', 'mean_fitness',
+                      'std_fitness', 'alpha', 'beta', 'gamma', 'delta')
+
+# ============================================================================
+# NÚCLEO DE ACTUALIZACIÓN DEL ENJAMBRE (COMPILADO CON NUMBA)
+# ============================================================================
+
+@njit(cache=True, fastmath=True)
+def pso_step(positions, velocities, personal_best_positions,
+             global_best_position, w, c1, c2, r1, r2):
+    """
+    Actualiza velocidad y posición de todo el enjambre in situ.
+
+    Aplica la regla clásica de PSO
+        v_new = w*v + c1*r1*(pbest - x) + c2*r2*(gbest - x)
+    seguida de la proyección de restricciones (pesos positivos con
+    suma = 1), todo dentro de un solo bucle compilado por Numba para
+    evitar los arreglos temporales que generaba la versión con NumPy
+    por partícula.
+
+    Args:
+        positions: Posiciones del enjambre, forma (P, 4), se modifica
+        velocities: Velocidades del enjambre, forma (P, 4), se modifica
+        personal_best_positions: Mejores personales, forma (P, 4)
+        global_best_position: Mejor global, forma (4,)
+        w, c1, c2: Parámetros del PSO
+        r1, r2: Componentes aleatorios por partícula, forma (P,)
+    """
+    for i in range(positions.shape[0]):
+        suma = 0.0
+        for d in range(positions.shape[1]):
+            velocities[i, d] = (w * velocities[i, d]
+                                + c1 * r1[i] * (personal_best_positions[i, d] - positions[i, d])
+                                + c2 * r2[i] * (global_best_position[d] - positions[i, d]))
+            positions[i, d] = abs(positions[i, d] + velocities[i, d])
+            suma += positions[i, d]
+
+        # Proyección de restricciones: pesos positivos y suma = 1.
+        # Si una partícula degenera en el vector cero, se deja tal cual
+        # en lugar de dividir entre cero (misma convención que
+        # sums[sums == 0] = 1 en la versión con NumPy)
+        if suma == 0.0:
+            suma = 1.0
+        for d in range(positions.shape[1]):
+            positions[i, d] = positions[i, d] / suma
 
 # ============================================================================
 # CLASE PARTICLE SWARM OPTIMIZER
@@ -25,13 +80,15 @@ class ParticleSwarmOptimizer:
         c1: Coeficiente cognitivo (atracción a mejor personal)
         c2: Coeficiente social (atracción a mejor global)
         seed: Semilla aleatoria para reproducibilidad
+        workers: Procesos para evaluar el enjambre en paralelo; con None
+            se usa la evaluación vectorizada en el mismo proceso
 
     Restricción: α + β + γ + δ = 1 (normalización de pesos)
     """
 
     def __init__(self, n_particles: int = 30, n_iterations: int = 150,
                  w: float = 0.7, c1: float = 1.5, c2: float = 1.5,
-                 seed: int = None):
+                 seed: int = None, workers: int = None):
         """
         Inicializa el optimizador PSO.
 
@@ -42,6 +99,11 @@ class ParticleSwarmOptimizer:
             c1: Factor cognitivo (típicamente 1.5-2.0)
             c2: Factor social (típicamente 1.5-2.0)
             seed: Semilla para reproducibilidad
+            workers: Número de procesos para evaluar el enjambre. Con la
+                utilidad de este proyecto (microsegundos por partícula) la
+                vía vectorizada por defecto es más rápida; esta opción
+                existe para objetivos costosos donde cada evaluación
+                domina sobre el costo de repartir el trabajo
         """
         self.n_particles = n_particles
         self.n_iterations = n_iterations
@@ -49,10 +111,13 @@ class ParticleSwarmOptimizer:
         self.c1 = c1  # Componente cognitivo
         self.c2 = c2  # Componente social
         self.seed = seed
+        self.workers = workers
         self.history = []
+        self.history_arr = np.empty((0, len(HISTORIAL_COLUMNAS)))
 
-        if seed is not None:
-            np.random.seed(seed)
+        # Generador moderno de NumPy (PCG64); con seed=None produce
+        # corridas no reproducibles, igual que antes
+        self.rng = np.random.default_rng(seed)
 
     def optimize(self, verbose: bool = True) -> Tuple[np.ndarray, Dict, List]:
         """
@@ -77,6 +142,30 @@ class ParticleSwarmOptimizer:
             - Resultado de utilidad de esa posición
             - Historial de optimización por iteración
         """
+        if self.workers:
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                return self._optimize(executor, verbose)
+        return self._optimize(None, verbose)
+
+    def _evaluar_enjambre(self, positions, executor):
+        """
+        Evalúa el enjambre completo y regresa (fitness, resultados).
+
+        Con executor reparte evaluar_pesos entre procesos y solo obtiene
+        el objetivo escalar (resultados es None); sin executor usa la
+        evaluación vectorizada y regresa también la matriz (P, 7).
+        """
+        if executor is not None:
+            chunk = max(1, self.n_particles // (4 * self.workers))
+            fitness = np.fromiter(
+                executor.map(evaluar_pesos, positions, chunksize=chunk),
+                dtype=np.float64, count=self.n_particles)
+            return fitness, None
+        resultados = calcular_utilidad_arr(positions)
+        return resultados[:, 0], resultados
+
+    def _optimize(self, executor, verbose: bool) -> Tuple[np.ndarray, Dict, List]:
+        """Cuerpo de optimize; ver su docstring."""
 
         if verbose:
             print("\nIniciando optimización PSO...")
@@ -87,13 +176,20 @@ class ParticleSwarmOptimizer:
         # PASO 1: Inicialización del enjambre
         # Usar distribución de Dirichlet para asegurar que suma = 1
         # Cada posición es un vector de 4 pesos que suman 1
-        positions = np.random.dirichlet(np.ones(4), self.n_particles)
-        velocities = np.random.randn(self.n_particles, 4) * 0.1
+        positions = self.rng.dirichlet(np.ones(4), self.n_particles)
+        velocities = self.rng.standard_normal((self.n_particles, 4)) * 0.1
 
-        # PASO 2: Evaluar fitness inicial
-        fitness = np.array([
-            calcular_utilidad(*pos)['utilidad_total'] for pos in positions
-        ])
+        # Componentes aleatorios de toda la corrida en una sola extracción
+        # vectorizada, en lugar de miles de llamadas individuales al RNG
+        R = self.rng.random((self.n_iterations, self.n_particles, 2))
+
+        # Historial preasignado: una fila por iteración en lugar de un
+        # diccionario nuevo por iteración
+        self.history_arr = np.empty((self.n_iterations, len(HISTORIAL_COLUMNAS)))
+
+        # PASO 2: Evaluar fitness inicial (todo el enjambre en una llamada)
+        fitness, resultados = self._evaluar_enjambre(positions, executor)
+        desviacion = fitness.std()
 
         # PASO 3: Inicializar mejores posiciones
         # Mejor personal (pbest): mejor posición que ha visitado cada partícula
@@ -104,63 +200,95 @@ class ParticleSwarmOptimizer:
         global_best_idx = np.argmax(personal_best_fitness)
         global_best_position = personal_best_positions[global_best_idx].copy()
         global_best_fitness = personal_best_fitness[global_best_idx]
-        global_best_result = calcular_utilidad(*global_best_position)
+        global_best_row = self._fila_resultado(resultados, positions,
+                                               global_best_idx)
 
         # PASO 4: Bucle principal de optimización
         for iteration in range(self.n_iterations):
-            for i in range(self.n_particles):
-                # Generar componentes aleatorios
-                r1, r2 = np.random.rand(), np.random.rand()
-
-                # Actualizar velocidad
-                # v_new = w*v + c1*r1*(pbest - x) + c2*r2*(gbest - x)
-                cognitive = self.c1 * r1 * (personal_best_positions[i] - positions[i])
-                social = self.c2 * r2 * (global_best_position - positions[i])
-                velocities[i] = self.w * velocities[i] + cognitive + social
-
-                # Actualizar posición
-                positions[i] = positions[i] + velocities[i]
-
-                # Asegurar restricciones: pesos positivos y suma = 1
-                positions[i] = np.abs(positions[i])
-                positions[i] = positions[i] / positions[i].sum()
-
-                # Evaluar nueva posición
-                resultado = calcular_utilidad(*positions[i])
-                fitness[i] = resultado['utilidad_total']
-
-                # Actualizar mejor personal si se encontró mejor solución
-                if fitness[i] > personal_best_fitness[i]:
-                    personal_best_fitness[i] = fitness[i]
-                    personal_best_positions[i] = positions[i].copy()
-
-                    # Actualizar mejor global si es necesario
-                    if fitness[i] > global_best_fitness:
-                        global_best_fitness = fitness[i]
-                        global_best_position = positions[i].copy()
-                        global_best_result = resultado
-
-            # Guardar estado actual en historial
-            self.history.append({
-                'iteration': iteration,
-                'best_fitness': global_best_fitness,
-                'mean_fitness': np.mean(fitness),
-                'std_fitness': np.std(fitness),
-                'alpha': global_best_position[0],
-                'beta': global_best_position[1],
-                'gamma': global_best_position[2],
-                'delta': global_best_position[3]
-            })
+            # Componentes aleatorios de esta iteración (precomputados)
+            r1 = R[iteration, :, 0]
+            r2 = R[iteration, :, 1]
+
+            # Actualizar velocidad y posición de todo el enjambre en el
+            # núcleo compilado (incluye la proyección de restricciones)
+            pso_step(positions, velocities, personal_best_positions,
+                     global_best_position, self.w, self.c1, self.c2, r1, r2)
+
+            # Evaluar el enjambre. Mientras el enjambre explora se usa la
+            # llamada vectorizada (o el pool de procesos, si se pidió);
+            # cuando ya convergió (poca dispersión en el fitness) las
+            # partículas repiten vectores casi idénticos y conviene la
+            # vía memoizada por pesos redondeados
+            if executor is None and desviacion < UMBRAL_MEMO:
+                resultados = np.stack([
+                    utilidad_fila_memo(positions[i])
+                    for i in range(self.n_particles)
+                ])
+                fitness = resultados[:, 0]
+            else:
+                fitness, resultados = self._evaluar_enjambre(positions, executor)
+
+            # Actualizar mejores personales donde hubo mejora
+            mejorados = fitness > personal_best_fitness
+            personal_best_fitness[mejorados] = fitness[mejorados]
+            personal_best_positions[mejorados] = positions[mejorados]
+
+            # Actualizar mejor global si es necesario (solo se copia la
+            # fila compacta; el diccionario se arma al final)
+            mejor_idx = np.argmax(fitness)
+            if fitness[mejor_idx] > global_best_fitness:
+                global_best_fitness = fitness[mejor_idx]
+                global_best_position = positions[mejor_idx].copy()
+                global_best_row = self._fila_resultado(resultados, positions,
+                                                       mejor_idx)
+
+            # Guardar estado actual en historial (media y desviación se
+            # calculan una sola vez y se reutilizan en el print y en el
+            # umbral de memoización de la siguiente iteración)
+            media = fitness.mean()
+            desviacion = fitness.std()
+            self.history_arr[iteration] = (iteration, global_best_fitness,
+                                           media, desviacion,
+                                           *global_best_position)
 
             # Mostrar progreso cada 30 iteraciones
             if verbose and (iteration % 30 == 0 or iteration == self.n_iterations - 1):
                 print(f"Iter {iteration:3d} | "
                       f"Mejor={global_best_fitness:6.2f} | "
-                      f"Media={np.mean(fitness):6.2f} | "
-                      f"Desv={np.std(fitness):5.2f}")
+                      f"Media={media:6.2f} | "
+                      f"Desv={desviacion:5.2f}")
 
         if verbose:
             print(f"\nOptimización completada en {self.n_iterations} iteraciones")
             print("="*70)
 
+        # Construir el diccionario de resultados una sola vez, para el
+        # mejor global definitivo
+        global_best_result = utilidad_a_dict(global_best_row)
+
+        # Vista de compatibilidad del historial como lista de diccionarios
+        self.history = self.historial_a_dicts()
+
         return global_best_position, global_best_result, self.history
+
+    @staticmethod
+    def _fila_resultado(resultados, positions, idx):
+        """
+        Fila (7,) de resultados para la partícula idx; si la evaluación
+        vino del pool de procesos (solo escalares), recalcula esa única
+        fila localmente.
+        """
+        if resultados is not None:
+            return resultados[idx].copy()
+        return calcular_utilidad_arr(positions[idx:idx + 1])[0]
+
+    def historial_a_dicts(self) -> List[Dict]:
+        """
+        Convierte la matriz history_arr al formato legado de lista de
+        diccionarios (uno por iteración, llaves en HISTORIAL_COLUMNAS).
+        """
+        return [
+            {clave: (int(valor) if clave == 'iteration' else float(valor))
+             for clave, valor in zip(HISTORIAL_COLUMNAS, fila)}
+            for fila in self.history_arr
+        ]
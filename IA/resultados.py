@@ -1,13 +1,101 @@
+import sys
 import numpy as np
 import pandas as pd
+from functools import lru_cache
 from typing import Tuple, Dict
 from normalizacion import COLONIAS, EDIFICACIONES
-from funciones import calcular_heuristica
+from funciones import _COMPONENTES
 
 # ============================================================================
 # FUNCIONES DE RANKING
 # ============================================================================
 
+# Nombres como arreglos de objetos, para reordenarlos con el take a nivel C
+# de NumPy en lugar de una comprensión de listas por llamada
+_COL_ARR = np.array(COLONIAS, dtype=object)
+_EDIF_ARR = np.array(EDIFICACIONES, dtype=object)
+
+@lru_cache(maxsize=4096)
+def _rankings_core(alpha: float, beta: float, gamma: float, delta: float,
+                   _K: np.ndarray = _COMPONENTES) -> Tuple[Tuple[float, ...],
+                                                           Tuple[float, ...]]:
+    """
+    Núcleo memoizado del ranking: calcula los promedios por colonia y por
+    edificación para un vector de pesos. Devuelve tuplas inmutables para
+    que las entradas del caché no puedan modificarse desde fuera.
+
+    El tensor de componentes se captura como argumento por defecto al
+    definir la función, lo que evita la búsqueda en globals() en cada
+    llamada del bucle de optimización.
+    """
+    # Ambos promedios se contraen directamente del tensor de componentes
+    # (4, E, C) sin materializar la matriz H intermedia: dos reducciones
+    # einsum en lugar de una construcción completa más dos medias
+    W = np.array([alpha, beta, gamma, delta], dtype=np.float32)
+    col_scores = np.einsum('k,kec->c', W, _K) / _K.shape[1]
+    edif_scores = np.einsum('k,kec->e', W, _K) / _K.shape[2]
+    return tuple(col_scores), tuple(edif_scores)
+
+
+def calcular_rankings_batch(W: np.ndarray,
+                            _K: np.ndarray = _COMPONENTES) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Calcula las puntuaciones de ranking para un lote de vectores de pesos.
+
+    Contrae la generación completa de un optimizador poblacional contra
+    el tensor de componentes en dos einsum, en lugar de P llamadas
+    individuales a _rankings_core.
+
+    Args:
+        W: Arreglo de forma (P, 4) con columnas [alpha, beta, gamma, delta]
+
+    Returns:
+        Tupla (col_scores, edif_scores) de formas (P, C) y (P, E) con el
+        promedio de heurística por colonia y por edificación de cada
+        vector de pesos, sin ordenar
+    """
+    W = np.asarray(W, dtype=np.float32)
+    col_scores = np.einsum('pk,kec->pc', W, _K) / _K.shape[1]
+    edif_scores = np.einsum('pk,kec->pe', W, _K) / _K.shape[2]
+    return col_scores, edif_scores
+
+
+def calcular_rankings_arrays(alpha: float, beta: float, gamma: float,
+                             delta: float) -> Tuple[Tuple[np.ndarray, np.ndarray],
+                                                    Tuple[np.ndarray, np.ndarray]]:
+    """
+    Calcula ambos rankings como arreglos ordenados, sin pandas.
+
+    Es la vía caliente del ranking: los consumidores que solo necesitan
+    los nombres y puntuaciones ordenados (p. ej. un optimizador o una
+    salida JSON) la usan directamente sin pagar la construcción de
+    DataFrames; calcular_rankings la envuelve para presentación.
+
+    Los promedios se memoizan por vector de pesos (redondeado a 8
+    decimales), de modo que re-consultar los mismos pesos durante la
+    optimización se resuelve con una búsqueda en caché.
+
+    Args:
+        alpha, beta, gamma, delta: Pesos de la heurística
+
+    Returns:
+        Tupla con ((nombres_colonias, prioridades_colonias),
+        (nombres_edificaciones, prioridades_edificaciones)), cada una
+        ordenada de mayor a menor prioridad
+    """
+    col_scores, edif_scores = _rankings_core(
+        round(alpha, 8), round(beta, 8), round(gamma, 8), round(delta, 8))
+    col_scores = np.asarray(col_scores)
+    edif_scores = np.asarray(edif_scores)
+
+    # El orden descendente se resuelve con argsort en NumPy
+    orden_col = np.argsort(-col_scores, kind='stable')
+    orden_edif = np.argsort(-edif_scores, kind='stable')
+
+    return ((_COL_ARR[orden_col], col_scores[orden_col]),
+            (_EDIF_ARR[orden_edif], edif_scores[orden_edif]))
+
+
 def calcular_rankings(alpha: float, beta: float, gamma: float, delta: float) -> Tuple[pd.DataFrame, pd.DataFrame]:
     """
     Calcula rankings de prioridad para colonias y edificaciones.
@@ -15,46 +103,30 @@ def calcular_rankings(alpha: float, beta: float, gamma: float, delta: float) ->
     Para cada colonia: promedia la heurística de todas sus edificaciones
     Para cada edificación: promedia la heurística en todas las colonias
 
+    Envoltura de presentación sobre calcular_rankings_arrays: construye
+    los DataFrames ya ordenados y con su columna Ranking, para cuando un
+    humano va a mirar las tablas.
+
     Args:
         alpha, beta, gamma, delta: Pesos de la heurística
 
     Returns:
         Tupla con (df_colonias, df_edificaciones) ordenados por prioridad
     """
+    (col_nombres, col_prior), (edif_nombres, edif_prior) = \
+        calcular_rankings_arrays(alpha, beta, gamma, delta)
+
+    df_colonias = pd.DataFrame({
+        'Colonia': col_nombres,
+        'Prioridad': col_prior,
+        'Ranking': np.arange(1, len(col_nombres) + 1, dtype=np.int32)
+    })
 
-    # RANKING POR COLONIA
-    # Para cada colonia, promediar prioridad de todas las edificaciones
-    ranking_colonias = {}
-    for colonia in COLONIAS:
-        valores = [
-            calcular_heuristica(alpha, beta, gamma, delta, edif, colonia)
-            for edif in EDIFICACIONES
-        ]
-        ranking_colonias[colonia] = np.mean(valores)
-
-    df_colonias = pd.DataFrame(
-        list(ranking_colonias.items()),
-        columns=['Colonia', 'Prioridad']
-    )
-    df_colonias = df_colonias.sort_values('Prioridad', ascending=False).reset_index(drop=True)
-    df_colonias['Ranking'] = range(1, len(df_colonias) + 1)
-
-    # RANKING POR EDIFICACIÓN
-    # Para cada edificación, promediar prioridad en todas las colonias
-    ranking_edificaciones = {}
-    for edificacion in EDIFICACIONES:
-        valores = [
-            calcular_heuristica(alpha, beta, gamma, delta, edificacion, col)
-            for col in COLONIAS
-        ]
-        ranking_edificaciones[edificacion] = np.mean(valores)
-
-    df_edificaciones = pd.DataFrame(
-        list(ranking_edificaciones.items()),
-        columns=['Edificación', 'Prioridad']
-    )
-    df_edificaciones = df_edificaciones.sort_values('Prioridad', ascending=False).reset_index(drop=True)
-    df_edificaciones['Ranking'] = range(1, len(df_edificaciones) + 1)
+    df_edificaciones = pd.DataFrame({
+        'Edificación': edif_nombres,
+        'Prioridad': edif_prior,
+        'Ranking': np.arange(1, len(edif_nombres) + 1, dtype=np.int32)
+    })
 
     return df_colonias, df_edificaciones
 
@@ -62,48 +134,82 @@ def calcular_rankings(alpha: float, beta: float, gamma: float, delta: float) ->
 # FUNCIÓN PARA IMPRIMIR RESULTADOS DETALLADOS
 # ============================================================================
 
-def imprimir_resultados_detallados(pesos: np.ndarray, resultado: Dict):
+def imprimir_resultados_detallados(pesos: np.ndarray, resultado: Dict,
+                                   modo_json: bool = False):
     """
     Imprime resultados detallados de la optimización.
 
     Args:
         pesos: Array con [α, β, γ, δ]
         resultado: Diccionario con utilidad y componentes
-    """
-    print("\n" + "="*80)
-    print("RESULTADOS DE LA OPTIMIZACIÓN")
-    print("="*80)
+        modo_json: Si True no imprime ni construye DataFrames; regresa un
+            diccionario serializable con pesos, utilidad y rankings,
+            armado directamente de los arreglos ordenados
 
-    # PESOS ÓPTIMOS    
-    print("\n\nPESOS ÓPTIMOS DE LA HEURÍSTICA")
+    Returns:
+        Diccionario con los resultados cuando modo_json es True;
+        None en modo de impresión
+    """
+    if modo_json:
+        (col_nombres, col_prior), (edif_nombres, edif_prior) = \
+            calcular_rankings_arrays(*pesos)
+        return {
+            'pesos': {
+                'alpha': float(pesos[0]),
+                'beta': float(pesos[1]),
+                'gamma': float(pesos[2]),
+                'delta': float(pesos[3])
+            },
+            'utilidad': {clave: float(valor) for clave, valor in resultado.items()},
+            'colonias': [
+                {'colonia': nombre, 'prioridad': float(prioridad), 'ranking': i + 1}
+                for i, (nombre, prioridad) in enumerate(zip(col_nombres, col_prior))
+            ],
+            'edificaciones': [
+                {'edificacion': nombre, 'prioridad': float(prioridad), 'ranking': i + 1}
+                for i, (nombre, prioridad) in enumerate(zip(edif_nombres, edif_prior))
+            ]
+        }
+
+    # Acumular todas las líneas del reporte y escribirlas en una sola
+    # llamada, en lugar de un print (con su flush) por línea
+    lineas = []
+    lineas.append("\n" + "="*80)
+    lineas.append("RESULTADOS DE LA OPTIMIZACIÓN")
+    lineas.append("="*80)
+
+    # PESOS ÓPTIMOS
+    lineas.append("\n\nPESOS ÓPTIMOS DE LA HEURÍSTICA")
     nombres_pesos = ['α (Legal)', 'β (Social)', 'γ (Consumo)', 'δ (Reportes)']
     for nombre, peso in zip(nombres_pesos, pesos):
-        print(f"   {nombre:15} = {peso:.4f}")
-    print(f"   {'Suma':15} = {pesos.sum():.4f}  (debe ser 1.0)")
+        lineas.append(f"   {nombre:15} = {peso:.4f}")
+    lineas.append(f"   {'Suma':15} = {pesos.sum():.4f}  (debe ser 1.0)")
 
     # UTILIDAD TOTAL
-    print(f"\n\nUTILIDAD TOTAL: {resultado['utilidad_total']:6.2f} / 100")
+    lineas.append(f"\n\nUTILIDAD TOTAL: {resultado['utilidad_total']:6.2f} / 100")
 
     # COMPONENTES
-    print("\n\nCOMPONENTES DE LA UTILIDAD (5 FACTORES)")
-    print(f"   Equidad (35%):           {resultado['equidad']:6.2f}/100")
-    print(f"   Coef. Gini:           {resultado['coeficiente_gini']:.4f}")
-    print(f"   Social (25%):            {resultado['satisfaccion_social']:6.2f}/100")
-    print(f"   Legal (25%):             {resultado['cumplimiento_legal']:6.2f}/100")
-    print(f"   Atención Consumo (10%):  {resultado['atencion_consumo']:6.2f}/100")
-    print(f"   Atención Reportes (10%): {resultado['atencion_reportes']:6.2f}/100")
+    lineas.append("\n\nCOMPONENTES DE LA UTILIDAD (5 FACTORES)")
+    lineas.append(f"   Equidad (35%):           {resultado['equidad']:6.2f}/100")
+    lineas.append(f"   Coef. Gini:           {resultado['coeficiente_gini']:.4f}")
+    lineas.append(f"   Social (25%):            {resultado['satisfaccion_social']:6.2f}/100")
+    lineas.append(f"   Legal (25%):             {resultado['cumplimiento_legal']:6.2f}/100")
+    lineas.append(f"   Atención Consumo (10%):  {resultado['atencion_consumo']:6.2f}/100")
+    lineas.append(f"   Atención Reportes (10%): {resultado['atencion_reportes']:6.2f}/100")
 
     # RANKINGS
     df_colonias, df_edificaciones = calcular_rankings(*pesos)
 
-    print("\n\nDISTRIBUCIÓN DE PRIORIDAD POR COLONIA: ")
-    print("   " + " → ".join(df_colonias['Colonia'].tolist()))
+    lineas.append("\n\nDISTRIBUCIÓN DE PRIORIDAD POR COLONIA: ")
+    lineas.append("   " + " → ".join(df_colonias['Colonia'].tolist()))
+
+    lineas.append("\n\nDISTRIBUCIÓN DE PRIORIDAD POR EDIFICACIÓN")
+    lineas.append("   " + " → ".join(df_edificaciones['Edificación'].tolist()))
 
-    print("\n\nDISTRIBUCIÓN DE PRIORIDAD POR EDIFICACIÓN")
-    print("   " + " → ".join(df_edificaciones['Edificación'].tolist()))
+    lineas.append("\n\nTABLA DETALLADA - COLONIAS")
+    lineas.append(df_colonias.to_string(index=False, float_format=lambda x: f'{x:.4f}'))
 
-    print("\n\nTABLA DETALLADA - COLONIAS")
-    print(df_colonias.to_string(index=False, float_format=lambda x: f'{x:.4f}'))
+    lineas.append("\n\nTABLA DETALLADA - EDIFICACIONES")
+    lineas.append(df_edificaciones.to_string(index=False, float_format=lambda x: f'{x:.4f}'))
 
-    print("\n\nTABLA DETALLADA - EDIFICACIONES")
-    print(df_edificaciones.to_string(index=False, float_format=lambda x: f'{x:.4f}'))
+    sys.stdout.write("\n".join(lineas) + "\n")